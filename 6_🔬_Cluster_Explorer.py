@@ -1,6 +1,5 @@
 import streamlit as st
-import pandas as pd
-from backend.clustering import analyze_clusters, load_clustering_artifacts
+from backend.clustering import get_cluster_analysis, get_answer_tables, FEATURE_COLS, display_name
 
 st.set_page_config(layout="wide", page_title="🔬 Cluster Explorer")
 
@@ -8,15 +7,9 @@ st.title("🔬 Star Wars Fan Cluster Explorer")
 st.caption("Interactively explore the characteristics of each fan cluster to understand their defining preferences.")
 
 # --- Load Model and Analyze Clusters ---
-@st.cache_data
-def load_analysis():
-    # First, ensure model artifacts exist, otherwise, analysis is not possible
-    model, _, _ = load_clustering_artifacts()
-    if model is None:
-        return None, None
-    return analyze_clusters()
-
-cluster_summary, num_clusters = load_analysis()
+# Cached on the data and model mtimes; all Nones when the model hasn't been trained
+cluster_summary, _, num_clusters = get_cluster_analysis()
+answer_tables = get_answer_tables()
 
 if cluster_summary is None:
     st.error("Model artifacts not found. Please train the model first on the 'Fan Quiz' page.")
@@ -26,26 +19,25 @@ if cluster_summary is None:
 # --- Interactive Cluster Selection ---
 st.header("Select a Cluster to Analyze")
 
-selected_cluster = st.slider(
+# A selectbox commits once per choice, where a slider reruns the page on every drag tick
+selected_cluster = st.selectbox(
     "Cluster ID", 
-    min_value=0, 
-    max_value=num_clusters - 1, 
-    value=0, 
-    step=1
+    range(num_clusters), 
+    index=0
 )
 
 st.markdown("--- ")
 
 # --- Display Cluster Details ---
-if selected_cluster in cluster_summary:
-    summary = cluster_summary[selected_cluster]
+if selected_cluster in cluster_summary.index:
+    summary = cluster_summary.loc[selected_cluster]
     
     st.header(f"Cluster #{selected_cluster} Profile")
     
     # --- Key Metrics ---
     col1, col2 = st.columns(2)
     with col1:
-        st.metric("Cluster Size (Number of Fans)", f"{summary['size']:,}")
+        st.metric("Cluster Size (Number of Fans)", f"{int(summary['size']):,}")
     with col2:
         st.metric("Percentage of Total Fans", f"{summary['percentage']:.1f}%")
 
@@ -53,43 +45,20 @@ if selected_cluster in cluster_summary:
     st.caption("This shows the top answers for each category and what percentage of fans in this cluster chose them.")
 
     # --- Display Top Answers in Columns ---
-    feature_cols = ["fav_heroe", "fav_villain", "fav_soundtrack", 
-                    "fav_spaceship", "fav_planet", "fav_robot"]
-    
-    # Display name mapping for better user experience
-    display_names = {
-        "fav_heroe": "Hero",
-        "fav_villain": "Villain", 
-        "fav_soundtrack": "Soundtrack",
-        "fav_spaceship": "Spaceship",
-        "fav_planet": "Planet",
-        "fav_robot": "Robot"
-    }
-    
+
     display_cols = st.columns(3)
     col_idx = 0
 
-    for cat_col in feature_cols:
+    for cat_col in FEATURE_COLS:
         with display_cols[col_idx % 3]:
-            category_name = display_names.get(cat_col, cat_col.replace('fav_', '').replace('_', ' ').title())
+            category_name = display_name(cat_col)
             st.markdown(f"**Favorite {category_name}**")
             
-            top_answers = summary['top_answers'].get(cat_col, [])
+            answer_key = (selected_cluster, cat_col)
             
-            if top_answers:
-                # Create a DataFrame for better display
-                df_answers = pd.DataFrame(top_answers, columns=["Answer", "Count", "Percentage"])
-                df_answers['Percentage'] = df_answers['Percentage'].map('{:.1f}%'.format)
-                
-                # Highlight the top answer
-                def highlight_top(s):
-                    return ['background-color: #2E4053' if i == 0 else '' for i in range(len(s))]
-
-                st.dataframe(
-                    df_answers[['Answer', 'Percentage']].style.apply(highlight_top, axis=0),
-                    hide_index=True,
-                    use_container_width=True
-                )
+            if answer_key in answer_tables:
+                # Prebuilt markdown (top answer in bold), cached with the analysis
+                st.markdown(answer_tables[answer_key])
             else:
                 st.write("No data available.")
         
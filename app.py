@@ -1,9 +1,19 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from config.config import STARWARS_CSS
+
+# Sample data vocabularies (module-level so they aren't rebuilt on every call)
+SAMPLE_CHARACTERS = ('Luke Skywalker', 'Darth Vader', 'Princess Leia', 'Han Solo', 'Yoda', 'Obi-Wan Kenobi', 'R2-D2', 'C-3PO', 'Chewbacca', 'Boba Fett')
+SAMPLE_PLANETS = ('Tatooine', 'Coruscant', 'Hoth', 'Endor', 'Dagobah', 'Bespin', 'Naboo', 'Alderaan', 'Kashyyyk', 'Mandalore')
+SAMPLE_FILMS = ('A New Hope', 'The Empire Strikes Back', 'Return of the Jedi', 'The Phantom Menace', 'Attack of the Clones', 'Revenge of the Sith', 'The Force Awakens', 'The Last Jedi', 'The Rise of Skywalker')
+
+# Sidebar selector options
+NAV_PAGES = ("Home", "Fan Quiz", "Your Result", "Network Analysis", "Model Management", "About")
+GALAXY_OPTIONS = ("Main Galaxy", "Unknown Regions", "Wild Space", "Deep Core")
+ERA_OPTIONS = ("Original Trilogy", "Prequel Trilogy", "Sequel Trilogy", "High Republic", "Legends")
 
 # Page configuration
 st.set_page_config(
@@ -14,31 +24,7 @@ st.set_page_config(
 )
 
 # Custom CSS for better styling
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 3rem;
-        color: #FFD700;
-        text-align: center;
-        margin-bottom: 2rem;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.5);
-    }
-    .metric-card {
-        background: linear-gradient(135deg, #1a1a2e, #16213e);
-        padding: 1rem;
-        border-radius: 10px;
-        border-left: 5px solid #FFD700;
-        color: white;
-    }
-    .sidebar .sidebar-content {
-        background: linear-gradient(180deg, #0f0f23, #1a1a2e);
-        color: white;
-    }
-    .stApp {
-        background: linear-gradient(135deg, #0f0f23, #1a1a2e, #16213e);
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(STARWARS_CSS, unsafe_allow_html=True)
 
 def main():
     # Main header
@@ -49,7 +35,7 @@ def main():
         st.header("🌌 Navigation")
         page = st.selectbox(
             "Choose a page:",
-            ["Home", "Fan Quiz", "Your Result", "Network Analysis", "Model Management", "About"]
+            NAV_PAGES
         )
         
         st.markdown("---")
@@ -58,13 +44,13 @@ def main():
         # Galaxy selector
         galaxy = st.selectbox(
             "Select Galaxy:",
-            ["Main Galaxy", "Unknown Regions", "Wild Space", "Deep Core"]
+            GALAXY_OPTIONS
         )
         
         # Era selector
         era = st.selectbox(
             "Select Era:",
-            ["Original Trilogy", "Prequel Trilogy", "Sequel Trilogy", "High Republic", "Legends"]
+            ERA_OPTIONS
         )
     
     # Main content based on selected page
@@ -164,24 +150,34 @@ def show_home_page():
     col1, col2 = st.columns(2)
     
     with col1:
-        fig = px.bar(
-            x=['Heroes', 'Villains', 'Droids', 'Aliens', 'Jedi'],
-            y=[45, 30, 15, 25, 35],
-            title="Character Type Popularity",
-            color_discrete_sequence=['#FFD700', '#C0C0C0', '#CD7F32', '#4B0082', '#00CED1']
-        )
-        fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
-        st.plotly_chart(fig, width='stretch')
+        st.plotly_chart(build_character_popularity_chart(), width='stretch')
     
     with col2:
-        fig = px.pie(
-            values=[35, 25, 20, 15, 5],
-            names=['Original Trilogy', 'Prequel Trilogy', 'Sequel Trilogy', 'TV Shows', 'Legends'],
-            title="Fan Preference by Era",
-            color_discrete_sequence=['#FFD700', '#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4']
-        )
-        fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
-        st.plotly_chart(fig, width='stretch')
+        st.plotly_chart(build_era_preference_chart(), width='stretch')
+
+
+@st.cache_resource
+def build_character_popularity_chart():
+    """Static bar chart for the home page, built once per process"""
+    fig = go.Figure(go.Bar(
+        x=['Heroes', 'Villains', 'Droids', 'Aliens', 'Jedi'],
+        y=[45, 30, 15, 25, 35],
+        marker_color='#FFD700'
+    ))
+    fig.update_layout(title="Character Type Popularity", plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+    return fig
+
+
+@st.cache_resource
+def build_era_preference_chart():
+    """Static pie chart for the home page, built once per process"""
+    fig = go.Figure(go.Pie(
+        values=[35, 25, 20, 15, 5],
+        labels=['Original Trilogy', 'Prequel Trilogy', 'Sequel Trilogy', 'TV Shows', 'Legends'],
+        marker=dict(colors=['#FFD700', '#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4'])
+    ))
+    fig.update_layout(title="Fan Preference by Era", plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+    return fig
 
 
 def show_about():
@@ -218,20 +214,18 @@ def show_about():
     - [Scikit-learn Documentation](https://scikit-learn.org/)
     """)
 
+@st.cache_data(ttl=3600)
 def generate_sample_data():
     """Generate sample Star Wars fan data for demonstration"""
     np.random.seed(42)
     
-    characters = ['Luke Skywalker', 'Darth Vader', 'Princess Leia', 'Han Solo', 'Yoda', 'Obi-Wan Kenobi', 'R2-D2', 'C-3PO', 'Chewbacca', 'Boba Fett']
-    planets = ['Tatooine', 'Coruscant', 'Hoth', 'Endor', 'Dagobah', 'Bespin', 'Naboo', 'Alderaan', 'Kashyyyk', 'Mandalore']
-    films = ['A New Hope', 'The Empire Strikes Back', 'Return of the Jedi', 'The Phantom Menace', 'Attack of the Clones', 'Revenge of the Sith', 'The Force Awakens', 'The Last Jedi', 'The Rise of Skywalker']
-    
     data = {
         'fan_id': range(1, 101),
         'age': np.random.randint(16, 65, 100),
-        'favorite_character': np.random.choice(characters, 100),
-        'favorite_planet': np.random.choice(planets, 100),
-        'favorite_film': np.random.choice(films, 100),
+        # Categoricals serialize to Arrow as dictionary-encoded columns for st.dataframe
+        'favorite_character': pd.Categorical(np.random.choice(SAMPLE_CHARACTERS, 100), categories=SAMPLE_CHARACTERS),
+        'favorite_planet': pd.Categorical(np.random.choice(SAMPLE_PLANETS, 100), categories=SAMPLE_PLANETS),
+        'favorite_film': pd.Categorical(np.random.choice(SAMPLE_FILMS, 100), categories=SAMPLE_FILMS),
         'fan_score': np.random.randint(1, 100, 100),
         'years_fan': np.random.randint(1, 45, 100),
         'cluster': np.random.randint(0, 9, 100)
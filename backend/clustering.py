@@ -1,10 +1,22 @@
+import numpy as np
 import pandas as pd
 import joblib
+from functools import lru_cache
 from pathlib import Path
+from joblib import Memory
 from sklearn.preprocessing import OneHotEncoder, normalize
 from sklearn.tree import DecisionTreeClassifier
-from sklearn.cluster import KMeans
-from sklearn.metrics import silhouette_score
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import calinski_harabasz_score
+
+try:
+    import streamlit as st
+    cache_data, cache_resource = st.cache_data, st.cache_resource
+except ImportError:
+    # Allow running this module as a plain script without Streamlit installed
+    def cache_data(func):
+        return func
+    cache_resource = cache_data
 
 # Define paths
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -16,15 +28,46 @@ MODELS_DIR.mkdir(exist_ok=True)
 KMEANS_MODEL_PATH = MODELS_DIR / "kmeans_model.joblib"
 ENCODER_PATH = MODELS_DIR / "encoder.joblib"
 TOP_FEATURES_PATH = MODELS_DIR / "top_features.joblib"
+TOP_IDX_PATH = MODELS_DIR / "top_idx.joblib"
+
+# Survey columns the model is trained on, in encoder order
+FEATURE_COLS = ("fav_heroe", "fav_villain", "fav_soundtrack",
+                "fav_spaceship", "fav_planet", "fav_robot")
+
+# Display name mapping for better user experience (dataset uses 'heroe' spelling)
+DISPLAY_NAMES = {
+    "fav_heroe": "Hero",
+    "fav_villain": "Villain",
+    "fav_soundtrack": "Soundtrack",
+    "fav_spaceship": "Spaceship",
+    "fav_planet": "Planet",
+    "fav_robot": "Robot"
+}
+
+
+def display_name(col):
+    """Display name for a fav_* column, falling back to a title-cased column name."""
+    return DISPLAY_NAMES.get(col) or col.removeprefix("fav_").replace("_", " ").title()
+
+# Memoized training results, keyed on the CSV's mtime/size and hyperparameters
+memory = Memory(MODELS_DIR / "cache", verbose=0)
 
 
 def get_top_features_by_cart(df, target_col, feature_cols, n_features=8):
-    """Trains a CART model to find the most predictive features."""
-    X = df[feature_cols].astype(str)
+    """Trains a CART model to find the most predictive features.
+
+    Feature columns are expected to be categorical; their categories are handed
+    to the encoder so it doesn't have to rediscover the unique values.
+    """
+    X = df[feature_cols]
     y = df[target_col].astype(str)
     
-    # One-hot encode features
-    encoder = OneHotEncoder(handle_unknown="ignore", sparse_output=False)
+    # One-hot encode features (kept sparse; the tree and KMeans both accept CSR).
+    # float32 halves the bytes moved through KMeans' distance loops.
+    encoder = OneHotEncoder(
+        categories=[X[c].cat.categories.tolist() for c in feature_cols],
+        handle_unknown="ignore", sparse_output=True, dtype=np.float32
+    )
     X_enc = encoder.fit_transform(X)
     
     # Train a Decision Tree to get feature importances
@@ -41,22 +84,26 @@ def get_top_features_by_cart(df, target_col, feature_cols, n_features=8):
     return top_features, encoder
 
 
-def train_and_save_clustering_model(n_features=8):
-    """Full pipeline to train the clustering model and save artifacts."""
-    print("Starting clustering model training...")
-    
-    # 1. Load data
-    try:
-        df = pd.read_csv(DATA_DIR / "starwars.csv")
-        print(f"Loaded data: {df.shape}")
-    except FileNotFoundError:
-        print(f"Error: starwars.csv not found in {DATA_DIR}")
-        return None, None, None
+def top_feature_index(all_feature_names, top_features):
+    """Maps top feature names to their column positions in the encoded matrix."""
+    name_to_idx = {name: i for i, name in enumerate(all_feature_names)}
+    return np.array([name_to_idx[f] for f in top_features], dtype=np.int32)
 
-    # 2. Define features and target
-    feature_cols = ["fav_heroe", "fav_villain", "fav_soundtrack", 
-                    "fav_spaceship", "fav_planet", "fav_robot"]
+
+@memory.cache
+def _fit_clustering_model(csv_mtime, csv_size, n_features):
+    """Runs the CART + k search + KMeans pipeline.
+
+    ``csv_mtime`` and ``csv_size`` are only there to key the cache, so an
+    unchanged CSV and ``n_features`` load the previous result from disk.
+    """
+    # 1. Define features and target
+    feature_cols = list(FEATURE_COLS)
     target_col = "fav_film"
+
+    # 2. Load only those columns, as categoricals
+    df = pd.read_csv(DATA_DIR / "starwars.csv", engine="pyarrow", usecols=feature_cols + [target_col], dtype="category")
+    print(f"Loaded data: {df.shape}")
     
     # 3. Get top features using CART
     print(f"Identifying top {n_features} features using CART...")
@@ -64,54 +111,107 @@ def train_and_save_clustering_model(n_features=8):
     print(f"Top features identified: {top_features}")
     
     # 4. Prepare data for clustering
-    X = df[feature_cols].astype(str)
-    X_enc = encoder.transform(X)
+    X_enc = encoder.transform(df[feature_cols])
     all_feature_names = encoder.get_feature_names_out(feature_cols)
     
     # Get indices of top features
-    top_idx = [list(all_feature_names).index(f) for f in top_features]
+    top_idx = top_feature_index(all_feature_names, top_features)
     X_top = X_enc[:, top_idx]
     
-    # Normalize for cosine distance
-    Xn = normalize(X_top)
+    # Normalize for cosine distance (X_top is already a copy, normalize in place)
+    Xn = normalize(X_top, copy=False)
     
-    # 5. Find optimal k and train KMeans
+    # 5. Find optimal k with MiniBatchKMeans, then fit the final KMeans once.
+    # Calinski-Harabasz is O(n), unlike silhouette's pairwise distance matrix.
     print("Finding optimal k for KMeans...")
+    Xn_dense = Xn.toarray()  # only len(top_features) columns wide
     best = None
     for k in range(3, 10):
-        km = KMeans(n_clusters=k, n_init='auto', random_state=42).fit(Xn)
-        s = silhouette_score(Xn, km.labels_, metric="cosine")
+        km = MiniBatchKMeans(n_clusters=k, batch_size=1024, n_init=3, random_state=42).fit(Xn)
+        s = calinski_harabasz_score(Xn_dense, km.labels_)
         if best is None or s > best[0]:
-            best = (s, k, km)
+            best = (s, k)
     
-    sil, k, kmeans_model = best
-    print(f"Best clustering found: k={k} with silhouette score={sil:.3f}")
+    score, k = best
+    print(f"Best clustering found: k={k} with Calinski-Harabasz score={score:.1f}")
+    # Elkan's triangle-inequality bounds skip most distance evaluations at this width
+    kmeans_model = KMeans(n_clusters=k, n_init=3, init='k-means++', algorithm='elkan',
+                          max_iter=100, random_state=42).fit(Xn)
+    return kmeans_model, encoder, top_features, top_idx
+
+
+def train_and_save_clustering_model(n_features=8):
+    """Full pipeline to train the clustering model and save artifacts."""
+    print("Starting clustering model training...")
+
+    try:
+        csv_stat = (DATA_DIR / "starwars.csv").stat()
+    except FileNotFoundError:
+        print(f"Error: starwars.csv not found in {DATA_DIR}")
+        return None, None, None, None
+
+    # Reuses the cached fit when neither the CSV nor n_features changed
+    kmeans_model, encoder, top_features, top_idx = _fit_clustering_model(
+        csv_stat.st_mtime_ns, csv_stat.st_size, n_features
+    )
     
-    # 6. Save model, encoder, and top features
+    # Save model, encoder, and top features
     print(f"Saving artifacts to {MODELS_DIR}...")
-    joblib.dump(kmeans_model, KMEANS_MODEL_PATH)
-    joblib.dump(encoder, ENCODER_PATH)
-    joblib.dump(top_features, TOP_FEATURES_PATH)
+    # zlib level 3: smaller files at little load cost (joblib.load detects it, so older
+    # uncompressed artifacts still load)
+    joblib.dump(kmeans_model, KMEANS_MODEL_PATH, compress=3)
+    joblib.dump(encoder, ENCODER_PATH, compress=3)
+    joblib.dump(top_features, TOP_FEATURES_PATH, compress=3)
+    joblib.dump(top_idx, TOP_IDX_PATH, compress=3)
+
+    # Drop any cached copy of the previous artifacts
+    if hasattr(load_clustering_artifacts, "clear"):
+        load_clustering_artifacts.clear()
     
     print("✅ Training complete and artifacts saved.")
-    return kmeans_model, encoder, top_features
+    return kmeans_model, encoder, top_features, top_idx
 
 
+@cache_data
+def load_starwars_data():
+    """Reads the model's fav_* columns of the Star Wars survey CSV as categoricals (cached across Streamlit reruns)."""
+    # The pyarrow engine needs an explicit column list rather than a callable
+    return pd.read_csv(DATA_DIR / "starwars.csv", engine="pyarrow", usecols=list(FEATURE_COLS), dtype="category")
+
+
+@cache_resource
 def load_clustering_artifacts():
-    """Loads the saved clustering model, encoder, and feature list."""
-    if not all([KMEANS_MODEL_PATH.exists(), ENCODER_PATH.exists(), TOP_FEATURES_PATH.exists()]):
+    """Loads the saved clustering model, encoder, feature list, and feature indices."""
+    if not all([KMEANS_MODEL_PATH.exists(), ENCODER_PATH.exists(),
+                TOP_FEATURES_PATH.exists(), TOP_IDX_PATH.exists()]):
         print("Model artifacts not found. Please train the model first.")
-        return None, None, None
+        return None, None, None, None
     
     kmeans_model = joblib.load(KMEANS_MODEL_PATH)
     encoder = joblib.load(ENCODER_PATH)
     top_features = joblib.load(TOP_FEATURES_PATH)
+    top_idx = joblib.load(TOP_IDX_PATH)
     
     print("✅ Clustering artifacts loaded successfully.")
-    return kmeans_model, encoder, top_features
+    return kmeans_model, encoder, top_features, top_idx
+
 
+@lru_cache(maxsize=4)
+def _category_lookup(encoder):
+    """Per-column {category: position} dicts and column offsets of the one-hot layout."""
+    cat_lookup = [{value: i for i, value in enumerate(cats)} for cats in encoder.categories_]
+    col_offsets = np.cumsum([0] + [len(cats) for cats in encoder.categories_])
+    return cat_lookup, col_offsets
 
-def predict_cluster(user_preferences, kmeans_model, encoder, top_features):
+
+@lru_cache(maxsize=4)
+def _center_scoring(kmeans_model):
+    """Cluster centers and half their squared norms for dot-product assignment."""
+    centers = kmeans_model.cluster_centers_
+    return centers, 0.5 * np.einsum("ij,ij->i", centers, centers)
+
+
+def predict_cluster(user_preferences, kmeans_model, encoder, top_idx):
     """
     Predicts the cluster for a new user based on their preferences.
     
@@ -120,90 +220,139 @@ def predict_cluster(user_preferences, kmeans_model, encoder, top_features):
                                  (e.g., 'fav_heroe') and values are the user's choices.
         kmeans_model: The trained KMeans model.
         encoder: The fitted OneHotEncoder.
-        top_features (list): The list of top features used for clustering.
+        top_idx (np.ndarray): Encoded column positions of the top features.
 
     Returns:
         int: The predicted cluster ID.
     """
-    # Create a DataFrame from user preferences
-    user_df = pd.DataFrame([user_preferences])
-    
-    # Ensure all feature columns are present
-    feature_cols = ["fav_heroe", "fav_villain", "fav_soundtrack", 
-                    "fav_spaceship", "fav_planet", "fav_robot"]
-    for col in feature_cols:
-        if col not in user_df.columns:
-            user_df[col] = "None" # Or some other default/null value
-            
-    user_df = user_df[feature_cols].astype(str)
+    cat_lookup, col_offsets = _category_lookup(encoder)
     
-    # One-hot encode the user data
-    user_enc = encoder.transform(user_df)
-    all_feature_names = encoder.get_feature_names_out(feature_cols)
+    # One-hot encode the user data directly; unknown or missing answers stay all-zero
+    # (same as handle_unknown="ignore")
+    user_enc = np.zeros(col_offsets[-1])
+    for col_i, col_name in enumerate(FEATURE_COLS):
+        idx = cat_lookup[col_i].get(user_preferences.get(col_name, "None"))
+        if idx is not None:
+            user_enc[col_offsets[col_i] + idx] = 1.0
     
     # Select only the top features
-    top_idx = [list(all_feature_names).index(f) for f in top_features]
-    user_top = user_enc[:, top_idx]
+    user_top = user_enc[top_idx]
     
-    # Normalize and predict
-    user_norm = normalize(user_top)
-    cluster = kmeans_model.predict(user_norm)[0]
+    # Normalize and assign to the nearest center:
+    # argmin ||x - c||^2 == argmax (x . c - ||c||^2 / 2)
+    user_norm = user_top / (np.linalg.norm(user_top) or 1.0)
+    centers, half_sq_norms = _center_scoring(kmeans_model)
+    cluster = int(np.argmax(centers @ user_norm - half_sq_norms))
     
     return cluster
 
 
 # --- Example Usage (for testing) ---
 def analyze_clusters():
-    """Analyzes the dataset to find the defining characteristics of each cluster."""
+    """
+    Analyzes the dataset to find the defining characteristics of each cluster.
+
+    Returns:
+        tuple: (cluster_summary, top_answers, num_clusters), or Nones when the
+        model or data is unavailable.
+            cluster_summary (pd.DataFrame): indexed by cluster, with 'size' and
+                'percentage' (share of all fans).
+            top_answers (pd.DataFrame): indexed by (cluster, feature, rank), with
+                the top 3 'answer's per feature and their 'count' and
+                'percentage' within the cluster. Look up one cluster/feature
+                with ``top_answers.loc[(cluster, feature)]``.
+            num_clusters (int): Number of clusters in the model.
+    """
     print("Analyzing cluster characteristics...")
     
     # 1. Load artifacts and data
-    kmeans_model, encoder, top_features = load_clustering_artifacts()
+    kmeans_model, encoder, _, top_idx = load_clustering_artifacts()
     if kmeans_model is None:
-        return None, None
+        return None, None, None
 
     try:
-        df = pd.read_csv(DATA_DIR / "starwars.csv")
+        df = load_starwars_data()
     except FileNotFoundError:
         print(f"Error: starwars.csv not found in {DATA_DIR}")
-        return None, None
+        return None, None, None
 
     # 2. Assign clusters to the full dataset
-    feature_cols = ["fav_heroe", "fav_villain", "fav_soundtrack", 
-                    "fav_spaceship", "fav_planet", "fav_robot"]
-    X = df[feature_cols].astype(str)
-    X_enc = encoder.transform(X)
-    all_feature_names = encoder.get_feature_names_out(feature_cols)
-    
-    top_idx = [list(all_feature_names).index(f) for f in top_features]
+    feature_cols = list(FEATURE_COLS)
+    X_enc = encoder.transform(df[feature_cols])
     X_top = X_enc[:, top_idx]
     Xn = normalize(X_top)
     
-    df['cluster'] = kmeans_model.predict(Xn)
+    labels = kmeans_model.predict(Xn).astype(np.int8)  # n_clusters is well below 128
+    df = df.assign(cluster=labels)
     print("Assigned clusters to the full dataset.")
 
     # 3. Analyze each cluster
-    cluster_summary = {}
     num_clusters = kmeans_model.n_clusters
+    sizes = df['cluster'].value_counts().reindex(range(num_clusters), fill_value=0)
+    cluster_summary = pd.DataFrame({'size': sizes, 'percentage': 100 * sizes / len(df)})
+    cluster_summary.index.name = 'cluster'
 
-    for i in range(num_clusters):
-        cluster_df = df[df['cluster'] == i]
-        summary = {
-            'size': len(cluster_df),
-            'percentage': 100 * len(cluster_df) / len(df),
-            'top_answers': {}
-        }
-        
-        for col in feature_cols:
-            # Get top 3 most common answers and their percentage
-            counts = cluster_df[col].value_counts().nlargest(3)
-            percentages = 100 * counts / len(cluster_df)
-            summary['top_answers'][col] = list(zip(counts.index, counts, percentages))
-            
-        cluster_summary[i] = summary
+    # Top 3 most common answers per cluster: a clusters x categories crosstab per
+    # column from one bincount over the category codes (missing answers are code -1)
+    parts = []
+    for col in feature_cols:
+        cat = df[col].cat
+        codes = cat.codes.to_numpy()
+        n_cats = len(cat.categories)
+        answered = codes >= 0
+        crosstab = np.bincount(labels[answered].astype(np.intp) * n_cats + codes[answered],
+                               minlength=num_clusters * n_cats).reshape(num_clusters, n_cats)
+        order = np.argsort(-crosstab, axis=1, kind='stable')[:, :3]
+        top3 = np.take_along_axis(crosstab, order, axis=1)
+        rows, ranks = np.nonzero(top3)  # drop answers nobody in the cluster picked
+        parts.append(pd.DataFrame({
+            'cluster': rows,
+            'feature': col,
+            'answer': cat.categories[order[rows, ranks]].astype(str),
+            'count': top3[rows, ranks],
+        }))
+    top_answers = pd.concat(parts, ignore_index=True)
+    top_answers['percentage'] = 100 * top_answers['count'] / sizes.loc[top_answers['cluster']].to_numpy()
+    top_answers['rank'] = top_answers.groupby(['cluster', 'feature']).cumcount()
+    top_answers = top_answers.set_index(['cluster', 'feature', 'rank']).sort_index()
     
     print("✅ Cluster analysis complete.")
-    return cluster_summary, num_clusters
+    return cluster_summary, top_answers, num_clusters
+
+
+def _mtime(path):
+    return path.stat().st_mtime_ns if path.exists() else None
+
+
+@cache_data
+def cached_analyze_clusters(data_mtime, model_mtime):
+    """analyze_clusters(), cached per (CSV mtime, model mtime) so it reruns only when either file changes."""
+    return analyze_clusters()
+
+
+def get_cluster_analysis():
+    """Cluster analysis for the current data and model files, shared across pages and sessions."""
+    return cached_analyze_clusters(_mtime(DATA_DIR / "starwars.csv"), _mtime(KMEANS_MODEL_PATH))
+
+
+@cache_data
+def cached_answer_tables(data_mtime, model_mtime):
+    """Markdown top-answer table per (cluster, feature), with the top answer in bold."""
+    _, top_answers, _ = cached_analyze_clusters(data_mtime, model_mtime)
+    if top_answers is None:
+        return {}
+
+    tables = {}
+    for key, group in top_answers.groupby(level=['cluster', 'feature'], sort=False):
+        rows = [f"| {answer} | {pct:.1f}% |" for answer, pct in zip(group['answer'], group['percentage'])]
+        rows[0] = f"| **{group['answer'].iat[0]}** | **{group['percentage'].iat[0]:.1f}%** |"
+        tables[key] = "| Answer | Percentage |\n|---|---|\n" + "\n".join(rows)
+    return tables
+
+
+def get_answer_tables():
+    """Top-answer tables for the current data and model files (see cached_answer_tables)."""
+    return cached_answer_tables(_mtime(DATA_DIR / "starwars.csv"), _mtime(KMEANS_MODEL_PATH))
 
 
 if __name__ == '__main__':
@@ -212,7 +361,7 @@ if __name__ == '__main__':
         train_and_save_clustering_model()
     
     # Load the artifacts
-    model, enc, features = load_clustering_artifacts()
+    model, enc, _, top_idx = load_clustering_artifacts()
     
     if model:
         # Example user
@@ -225,7 +374,7 @@ if __name__ == '__main__':
             'fav_robot': 'R2-D2'
         }
         
-        predicted_cluster = predict_cluster(new_user, model, enc, features)
+        predicted_cluster = predict_cluster(new_user, model, enc, top_idx)
         print(f"\nExample user preferences: {new_user}")
         print(f"Predicted cluster: {predicted_cluster}")
         
@@ -239,6 +388,6 @@ if __name__ == '__main__':
             'fav_robot': 'C-3PO'
         }
         
-        predicted_cluster_2 = predict_cluster(new_user_2, model, enc, features)
+        predicted_cluster_2 = predict_cluster(new_user_2, model, enc, top_idx)
         print(f"\nExample user preferences: {new_user_2}")
         print(f"Predicted cluster: {predicted_cluster_2}")
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import pandas as pd
+from pathlib import Path
+
+try:
+    import streamlit as st
+    cache_resource = st.cache_resource
+except ImportError:
+    # Allow importing this module without Streamlit installed
+    def cache_resource(func=None, **kwargs):
+        return func if func is not None else (lambda f: f)
+
+# Define paths
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_PATH = BASE_DIR / "data" / "starwars.csv"
+PARQUET_PATH = DATA_PATH.with_suffix(".parquet")
+
+
+def _read_starwars_csv():
+    """Parses the survey CSV, storing the fav_* answer columns as categories."""
+    df = pd.read_csv(DATA_PATH, engine="pyarrow")
+    # Six answer columns with a few dozen distinct values each
+    return df.astype({c: "category" for c in df.columns if c.startswith("fav_")})
+
+
+def write_parquet_copy():
+    """Writes the Parquet copy of the survey that get_starwars_df prefers on cold starts.
+
+    The file is written under a temporary name and moved into place with
+    os.replace, so a concurrent reader never sees a partial file.
+    """
+    df = _read_starwars_csv()
+    fd, tmp_path = tempfile.mkstemp(dir=PARQUET_PATH.parent, suffix=".parquet.tmp")
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, PARQUET_PATH)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return PARQUET_PATH
+
+
+def get_starwars_df(data_mtime=None):
+    """Returns the Star Wars survey for the CSV's current version.
+
+    ``data_mtime`` is the CSV's ``st_mtime_ns``; callers that already key their
+    own cache on it pass it through so both caches agree on the version. When
+    omitted it's read from the file. Every session and page gets the same
+    DataFrame object (no per-hit copy), so callers must treat it as read-only.
+    """
+    if data_mtime is None:
+        data_mtime = DATA_PATH.stat().st_mtime_ns
+    return _load_starwars_df(data_mtime)
+
+
+# Keyed on the CSV mtime so an edited file is re-read; only the latest version is kept
+@cache_resource(max_entries=1)
+def _load_starwars_df(data_mtime):
+    """Reads the Parquet copy (see write_parquet_copy) when it's at least as new as
+    the CSV, otherwise parses the CSV."""
+    if PARQUET_PATH.exists() and PARQUET_PATH.stat().st_mtime_ns >= data_mtime:
+        df = pd.read_parquet(PARQUET_PATH)
+        # Re-assert the categories rather than rely on the Parquet round-trip metadata
+        return df.astype({c: "category" for c in df.columns if c.startswith("fav_")})
+    return _read_starwars_csv()
+
+
+if __name__ == "__main__":
+    print(f"Wrote {write_parquet_copy()}")
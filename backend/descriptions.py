@@ -0,0 +1,17 @@
+from types import MappingProxyType
+
+# Fan cluster descriptions shown on the result page (placeholders).
+# You can define more detailed and engaging descriptions for each cluster here.
+CLUSTER_DESCRIPTIONS = MappingProxyType({
+    0: "**The Senate Scholars:** This group is drawn to the intricate political maneuvering and grand-scale conflicts of the Republic era. They appreciate the complex characters and sophisticated starship designs that defined the fall of the Jedi and the rise of the Empire.",
+    1: "**The Core World Purists:** Fans in this cluster gravitate towards the foundational stories and characters of the original saga. Their preferences suggest a deep appreciation for the classic heroes' journey, the iconic struggle against tyranny, and the timeless aesthetic of the Galactic Civil War.",
+    2: "**The Outer Rim Mavericks:** This cluster identifies with the smugglers, bounty hunters, and independent spirits of the galaxy. They prefer the gritty, lived-in feel of frontier worlds like Tatooine and are fascinated by those who operate on the edges of the law.",
+    3: "**The Imperial Loyalists:** Adherents to order and power, this group is fascinated by the formidable presence of the Galactic Empire. They are drawn to its imposing military might, from the sleek design of TIE Fighters to the commanding presence of its dark-sided leaders.",
+    4: "**The Rebel Alliance Sympathizers:** This group stands with the underdogs and heroes fighting for freedom. Their choices reflect a love for the Rebellion's iconic starfighters, the camaraderie of its pilots, and the enduring hope that fuels their cause against overwhelming odds.",
+    5: "**The Force Mystics:** For this cluster, the heart of the saga lies in the mystical energy that binds the galaxy together. Whether Jedi or Sith, their interest is primarily in the characters who wield the Force and the ancient prophecies that surround them.",
+    6: "**The Republic Veterans:** This group's preferences are firmly rooted in the Clone Wars era. They are captivated by the epic battles, the diverse legions of clone troopers, and the tragic heroes who navigated the turbulent end of the Republic.",
+    7: "**The Scum and Villainy Aficionados:** Fans in this cluster are most interested in the galaxy's shadowy underworld. They appreciate the stories that unfold in cantinas and criminal dens, focusing on the complex motivations of those who thrive outside the law.",
+    8: "**The Skywalker Saga Devotees:** This group is focused on the central family drama that spans the first six films. Their choices indicate a deep investment in the intertwined destinies of the Skywalker lineage, from Anakin's fall to Luke's redemption."
+})
+
+DEFAULT_DESCRIPTION = "This cluster represents a unique combination of preferences! As we gather more data, a clearer profile for this group will emerge."
@@ -83,3 +83,30 @@ CUSTOM_CSS = """
     }
 </style>
 """
+
+# Star Wars theme for the main app
+STARWARS_CSS = """
+<style>
+    .main-header {
+        font-size: 3rem;
+        color: #FFD700;
+        text-align: center;
+        margin-bottom: 2rem;
+        text-shadow: 2px 2px 4px rgba(0,0,0,0.5);
+    }
+    .metric-card {
+        background: linear-gradient(135deg, #1a1a2e, #16213e);
+        padding: 1rem;
+        border-radius: 10px;
+        border-left: 5px solid #FFD700;
+        color: white;
+    }
+    .sidebar .sidebar-content {
+        background: linear-gradient(180deg, #0f0f23, #1a1a2e);
+        color: white;
+    }
+    .stApp {
+        background: linear-gradient(135deg, #0f0f23, #1a1a2e, #16213e);
+    }
+</style>
+"""
@@ -1,11 +1,13 @@
 import streamlit as st
-import pandas as pd
 from pathlib import Path
 from backend.clustering import (
     train_and_save_clustering_model, 
     load_clustering_artifacts, 
-    predict_cluster
+    predict_cluster,
+    FEATURE_COLS,
+    display_name
 )
+from backend.data_loader import DATA_PATH, get_starwars_df
 
 st.set_page_config(layout="centered", page_title="📝 Star Wars Fan Quiz")
 
@@ -14,36 +16,31 @@ st.caption("Answer these questions to find out which fan cluster you belong to!"
 
 # --- Paths and Data Loading ---
 BASE_DIR = Path(__file__).resolve().parent.parent
-DATA_PATH = BASE_DIR / "data" / "starwars.csv"
 MODELS_DIR = BASE_DIR / "models"
 
-@st.cache_data
 def load_data():
     if not DATA_PATH.exists():
         st.error(f"Data file not found at {DATA_PATH}")
         return None
-    return pd.read_csv(DATA_PATH)
-
-df = load_data()
-
-# --- State Management ---
-def initialize_state():
-    if 'artifacts_loaded' not in st.session_state:
-        st.session_state.artifacts_loaded = False
-    if 'kmeans_model' not in st.session_state:
-        st.session_state.kmeans_model = None
-    if 'encoder' not in st.session_state:
-        st.session_state.encoder = None
-    if 'top_features' not in st.session_state:
-        st.session_state.top_features = None
+    # Shared, read-only frame (cached once for all sessions)
+    return get_starwars_df()
 
-initialize_state()
+@st.cache_data
+def get_sorted_options(data_mtime):
+    """Sorted answer choices per quiz question; data_mtime re-keys the cache when the CSV changes."""
+    # Same version key as the loader, so an edited CSV is re-read rather than served stale
+    df = get_starwars_df(data_mtime)
+    # fav_* columns load as categoricals, so the choices are just the category table
+    return {c: sorted(df[c].astype("category").cat.categories.tolist()) for c in FEATURE_COLS}
 
+df = load_data()
 
 # --- Main Page Content ---
 
-# --- Display Top Features for Context ---
-if not st.session_state.artifacts_loaded:
+# --- Check the Model is Available ---
+# The artifacts are a process-wide cache_resource singleton, so this is a dict lookup after the first load
+kmeans_model, _, _, _ = load_clustering_artifacts()
+if kmeans_model is None:
     st.warning("⚠️ The clustering model is not loaded. Please visit the Model Management page to train or load the model.")
     st.page_link("pages/7_⚙️_Model_Management.py", label="Go to Model Management", icon="⚙️")
     st.stop()
@@ -53,28 +50,16 @@ st.header("Your Preferences")
 
 if df is not None:
     with st.form(key='fan_quiz_form'):
-        feature_cols = ["fav_heroe", "fav_villain", "fav_soundtrack", 
-                        "fav_spaceship", "fav_planet", "fav_robot"]
+        options_by_col = get_sorted_options(DATA_PATH.stat().st_mtime_ns)
         
         user_preferences = {}
         st.subheader("Select your favorites from each category:")
 
-        # Display name mapping for better user experience
-        display_names = {
-            "fav_heroe": "Hero",
-            "fav_villain": "Villain", 
-            "fav_soundtrack": "Soundtrack",
-            "fav_spaceship": "Spaceship",
-            "fav_planet": "Planet",
-            "fav_robot": "Robot"
-        }
-        
-        for col_name in feature_cols:
-            options = df[col_name].dropna().unique().tolist()
-            options.sort()
-            display_name = display_names.get(col_name, col_name.replace('fav_', '').replace('_', ' ').title())
+        for col_name in FEATURE_COLS:
+            options = options_by_col[col_name]
+            category_name = display_name(col_name)
             user_preferences[col_name] = st.selectbox(
-                f"**Favorite {display_name}**", 
+                f"**Favorite {category_name}**", 
                 options,
                 index=None, # No default selection
                 placeholder="Choose an option..."
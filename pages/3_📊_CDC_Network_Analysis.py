@@ -1,12 +1,12 @@
-import itertools, collections, math, os, tempfile
-from pathlib import Path
-
 import numpy as np
+import orjson
 import pandas as pd
 import streamlit as st
+from scipy.sparse import csr_matrix
 import streamlit.components.v1 as components
-from pyvis.network import Network
-from backend.clustering import load_clustering_artifacts  # <-- for cluster labels
+from backend.clustering import load_clustering_artifacts, KMEANS_MODEL_PATH  # <-- for cluster labels
+from backend.data_loader import DATA_PATH, get_starwars_df
+from utils.hashing import frame_fingerprint
 
 st.title("📊 CDC Network Analysis")
 st.caption("Interactive network visualization of Star Wars preferences co-occurrence patterns (cluster-aware)")
@@ -18,96 +18,84 @@ def _coerce_scalar_strings(df_in, cols):
     """Ensure fav_* columns are plain strings (not lists) so the saved encoder can transform."""
     df = df_in.copy()
     for c in cols:
-        df[c] = df[c].apply(
-            lambda v: (v[0] if isinstance(v, list) and len(v) > 0 else v)
-                      if (isinstance(v, list) or isinstance(v, tuple)) else v
-        )
+        # Only object columns can hold lists; string columns skip the per-cell pass
+        if df[c].dtype == object:
+            df[c] = df[c].map(
+                lambda v: (v[0] if isinstance(v, list) and len(v) > 0 else v)
+                          if (isinstance(v, list) or isinstance(v, tuple)) else v
+            )
         # force to string for non-null
         df[c] = df[c].astype("string")
     return df
 
-# -------------------------------
-# Module-level Jaccard
-# -------------------------------
-def jaccard(a: str, b: str, pairs: dict, freq: dict) -> float:
-    """Jaccard = (#both) / (#either) on review-level co-mentions."""
-    key = (a, b) if (a, b) in pairs else (b, a)
-    inter = pairs.get(key, 0)
-    denom = freq[a] + freq[b] - inter
-    return inter / denom if denom else 0.0
-
 # -------------------------------
 # Load data
 # -------------------------------
 @st.cache_data(show_spinner=False)
-def load_data():
-    local_path = Path(__file__).resolve().parent.parent / "data" / "starwars.csv"
-    if local_path.exists():
-        df = pd.read_csv(local_path)
-    else:
-        CSV_URL = "https://file.notion.so/f/f/480fe70d-ee65-4488-92ae-8d4ac37ffce6/b225252d-c56f-4474-948d-9070669832b6/Pop_Culture.csv?table=block&id=27233ee0-9d2c-802d-9775-ccdd8127eecb&spaceId=480fe70d-ee65-4488-92ae-8d4ac37ffce6&expirationTimestamp=1758420000000&signature=5oTANnbAtDKr0CVnVO8-ME364fgmZe8q41NHIiDYVrs&downloadName=Pop_Culture.csv"
-        df = pd.read_csv(CSV_URL)
-    return df
+def load_remote_data():
+    CSV_URL = "https://file.notion.so/f/f/480fe70d-ee65-4488-92ae-8d4ac37ffce6/b225252d-c56f-4474-948d-9070669832b6/Pop_Culture.csv?table=block&id=27233ee0-9d2c-802d-9775-ccdd8127eecb&spaceId=480fe70d-ee65-4488-92ae-8d4ac37ffce6&expirationTimestamp=1758420000000&signature=5oTANnbAtDKr0CVnVO8-ME364fgmZe8q41NHIiDYVrs&downloadName=Pop_Culture.csv"
+    return pd.read_csv(CSV_URL, engine="pyarrow")
 
-df = load_data()
+# Local CSV comes from the shared cache_resource loader (read-only, not copied per rerun)
+df = get_starwars_df() if DATA_PATH.exists() else load_remote_data()
 st.write(f"**Dataset shape:** {df.shape[0]:,} rows × {df.shape[1]} columns")
 
 # -------------------------------
 # Prepare items & co-occurrence
 # -------------------------------
-@st.cache_data(show_spinner=False)
-def process_data(df_in: pd.DataFrame):
-    fav_cols = [c for c in df_in.columns if c.lower().startswith("fav_")]
-    if not fav_cols:
-        return None, None, None, None
-
-    # Build "type:value" tokens per row (dataset uses 'heroe' spelling)
-    def prefixed_items(row):
-        items = []
-        # Display name mapping for better user experience
-        type_mapping = {
-            "heroe": "hero",
-            "villain": "villain", 
-            "soundtrack": "soundtrack",
-            "spaceship": "spaceship",
-            "planet": "planet",
-            "robot": "robot",
-            "film": "film"
-        }
-        
-        for c in fav_cols:
-            typ = c.lower().replace("fav_", "")
-            # Use mapped type for display, but keep original for processing
-            display_typ = type_mapping.get(typ, typ)
-            val = row[c]
-            if pd.notna(val) and str(val).strip():
-                items.append(f"{display_typ}:{val}")
-        return items
-
-    df_items = df_in.copy()
-    df_items["_items"] = df_items.apply(prefixed_items, axis=1)
-
-    freq = collections.Counter()
-    pairs = collections.Counter()
-    for items in df_items["_items"]:
-        u = sorted(set(items))
-        for a in u: freq[a] += 1
-        for a, b in itertools.combinations(u, 2):
-            pairs[(a, b)] += 1
+def encode_items(df_in: pd.DataFrame, fav_cols):
+    """Long-form (row position, "type:value" tag) arrays for every non-blank fav_ answer."""
+    # Display name mapping for better user experience (dataset uses 'heroe' spelling)
+    type_mapping = {
+        "heroe": "hero",
+        "villain": "villain", 
+        "soundtrack": "soundtrack",
+        "spaceship": "spaceship",
+        "planet": "planet",
+        "robot": "robot",
+        "film": "film"
+    }
+    # Use mapped type for display, but keep original column for processing
+    prefixes = {c: type_mapping.get(c.lower().replace("fav_", ""), c.lower().replace("fav_", "")) + ":"
+                for c in fav_cols}
+
+    # One stacked column of answers, blanks dropped, prefixed by their column's type
+    long = df_in[fav_cols].astype("string").reset_index(drop=True).stack()
+    vals = long.str.strip()
+    long = long[(vals.notna() & vals.ne("")).fillna(False)]
+    rows = long.index.get_level_values(0).to_numpy()
+    tags = long.index.get_level_values(1).map(prefixes).to_numpy(dtype=object) + long.to_numpy(dtype=object)
+    return rows, tags
 
-    def split_tag(tag):
-        return (tag.split(":", 1)[0], tag.split(":", 1)[1]) if ":" in tag else ("item", tag)
-
-    item_types = {it: split_tag(it)[0] for it in freq}
-    raw_labels = {it: split_tag(it)[1] for it in freq}
-    return freq, pairs, item_types, raw_labels
+@st.cache_data(show_spinner=False)
+def process_data(_incidence, _row_mask, data_key, model_mtime, cluster_choice):
+    # _incidence / _row_mask aren't hashed; the dataset fingerprint, model version and
+    # cluster choice identify the subset
+    M_all, items, item_types, raw_labels = _incidence
+    if not items:
+        return None, None, None, None, None
+
+    # Clusters partition the rows, so a subset is just a row slice of the full matrix
+    M = M_all if _row_mask is None else M_all[_row_mask]
+
+    freq = np.asarray(M.sum(axis=0)).ravel()
+
+    # Upper triangle of the co-occurrence matrix as parallel arrays, with each
+    # pair's Jaccard = (#both) / (#either) on review-level co-mentions
+    C = (M.T @ M).tocoo()
+    upper = C.row < C.col
+    a_idx, b_idx, inter = C.row[upper], C.col[upper], C.data[upper]
+    jac = inter / (freq[a_idx] + freq[b_idx] - inter)
+    pairs = (a_idx, b_idx, inter, jac)
+    return items, freq, pairs, item_types, raw_labels
 
 # -------------------------------
 # Add cluster labels to every row
 # -------------------------------
-@st.cache_data(show_spinner=False)
 def add_cluster_labels(df_in: pd.DataFrame):
-    model, enc, top_features = load_clustering_artifacts()
+    # Called only from the cached load_and_parse; the model and encoder come
+    # from the shared cache_resource loader, so nothing here is re-pickled
+    model, enc, _, top_idx = load_clustering_artifacts()
     if model is None or enc is None:
         st.error("❌ Could not load clustering artifacts. Train the model on the 'User Clustering' page.")
         st.stop()
@@ -120,18 +108,16 @@ def add_cluster_labels(df_in: pd.DataFrame):
     # 🔧 make sure they are scalar strings (not lists)
     df_use = _coerce_scalar_strings(df_in, base_cols)
 
-    # Transform and align with top_features
-    X_enc = enc.transform(df_use[base_cols])
-    X_arr = X_enc.toarray() if hasattr(X_enc, "toarray") else np.asarray(X_enc)
-    feat_names = enc.get_feature_names_out(base_cols)
-    X_df = pd.DataFrame(X_arr, columns=feat_names, index=df_use.index)
-
-    use_cols = [c for c in (top_features or []) if c in X_df.columns]
-    if not use_cols:
-        st.warning("top_features missing/mismatched; using ALL encoded features.")
-        use_cols = list(X_df.columns)
+    # Favourite combinations repeat a lot: encode/predict one row per distinct
+    # answer tuple and broadcast the labels back through the inverse index
+    keys = df_use[base_cols[0]].str.cat(df_use[base_cols[1:]], sep="\x1f", na_rep="\x00")
+    _, first_idx, inv = np.unique(keys.to_numpy(dtype=object), return_index=True, return_inverse=True)
+    uniq_rows = df_use[base_cols].iloc[first_idx]
 
-    labels = model.predict(X_df[use_cols].values)
+    # Transform and keep only the top-feature columns (positions saved with the model);
+    # KMeans predicts straight from a sparse slice, so nothing is densified
+    X_enc = enc.transform(uniq_rows)
+    labels = model.predict(X_enc[:, top_idx])[inv]
     out = df_in.copy()
     out["cluster"] = labels
 
@@ -143,7 +129,39 @@ def add_cluster_labels(df_in: pd.DataFrame):
 
     return out, sorted(vc.index.tolist())
 
-df_all, cluster_ids = add_cluster_labels(df)
+@st.cache_resource(show_spinner=False)
+def load_and_parse(_df: pd.DataFrame, data_key, model_mtime):
+    """Cluster labels plus the rows x items incidence matrix for the whole dataset, built once.
+
+    ``_df`` isn't hashed; ``data_key`` (frame_fingerprint) stands in for it, and
+    ``model_mtime`` re-keys the labels after the model is retrained.
+    The returned frame is shared across sessions, so treat it as read-only.
+    """
+    df_all, cluster_ids = add_cluster_labels(_df)
+    fav_cols = [c for c in _df.columns if c.lower().startswith("fav_")]
+    item_rows, item_tags = encode_items(df_all, fav_cols)
+
+    # Item ids follow sorted tag order, so a_idx < b_idx also means tag a < tag b
+    codes, items = pd.factorize(item_tags, sort=True)
+
+    # Sparse rows x items incidence matrix; M.T @ M holds every pair count at once
+    M_all = csr_matrix((np.ones(len(codes), dtype=np.int32), (item_rows, codes)),
+                       shape=(len(df_all), len(items)))
+    M_all.sum_duplicates()
+    M_all.data[:] = 1  # count each item at most once per row
+
+    def split_tag(tag):
+        return (tag.split(":", 1)[0], tag.split(":", 1)[1]) if ":" in tag else ("item", tag)
+
+    items = list(items)
+    item_types = [split_tag(it)[0] for it in items]
+    raw_labels = [split_tag(it)[1] for it in items]
+    return df_all, cluster_ids, (M_all, items, item_types, raw_labels)
+
+# Hash of every row (a few ms here) rather than Streamlit pickling the frame to hash it
+data_key = frame_fingerprint(df)
+model_mtime = KMEANS_MODEL_PATH.stat().st_mtime_ns if KMEANS_MODEL_PATH.exists() else None
+df_all, cluster_ids, incidence = load_and_parse(df, data_key, model_mtime)
 
 # -------------------------------
 # Sidebar controls (cluster first)
@@ -175,23 +193,25 @@ with st.sidebar:
     
 # Choose subset for the graph
 if cluster_choice == "All clusters":
-    df_view = df_all
-    st.caption(f"Showing **all clusters** ({len(df_view):,} rows)")
+    row_mask, n_view = None, len(df_all)
+    st.caption(f"Showing **all clusters** ({n_view:,} rows)")
 else:
     cid = int(cluster_choice.split()[-1])
-    df_view = df_all[df_all["cluster"] == cid]
-    st.caption(f"Showing **Cluster {cid}** only ({len(df_view):,} rows)")
+    row_mask = df_all["cluster"].to_numpy() == cid
+    n_view = int(row_mask.sum())
+    st.caption(f"Showing **Cluster {cid}** only ({n_view:,} rows)")
 
 # Build co-occurrence on the chosen subset
-freq, pairs, item_types, raw_labels = process_data(df_view)
-if freq is None:
+items, freq, pairs, item_types, raw_labels = process_data(incidence, row_mask, data_key, model_mtime, cluster_choice)
+if items is None:
     st.error("No favorites columns found (prefixed with 'fav_').")
     st.stop()
 
-types_present = sorted(set(item_types.values()))
+types_present = sorted(set(item_types))
 
-# Remaining sidebar controls (now that we know types present)
-with st.sidebar:
+# Remaining sidebar controls (now that we know types present).
+# Grouped in a form so dragging a slider doesn't rerun the page until "Apply".
+with st.sidebar, st.form("network_filters"):
     include_types = st.multiselect(
         "Item types to include",
         options=types_present,
@@ -202,6 +222,7 @@ with st.sidebar:
     edge_min_pair_count = st.slider("Min co-mentions", 2, 50, 12, 1)
     edge_min_jaccard = st.slider("Min Jaccard", 0.00, 0.30, 0.10, 0.01)
     max_edges = st.slider("Max edges", 200, 5000, 1500, 100)
+    st.form_submit_button("Apply filters", use_container_width=True)
 
 # -------------------------------
 # Build + render the network
@@ -214,24 +235,72 @@ TYPE_COLORS = {
 }
 DEFAULT_NODE_COLOR = "#c8d6e5"
 
-@st.cache_data(show_spinner=False)
-def build_galaxy_html(include_types, node_min_support, edge_min_pair_count, edge_min_jaccard, max_edges, cache_key):
-    allowed = {it for it in freq if item_types.get(it) in include_types and freq[it] >= node_min_support}
-    if not allowed:
-        return "<p style='color:#fff;padding:24px;text-align:center'>No items meet the threshold.</p>"
-
-    edges = []
-    for (a, b), inter in pairs.items():
-        if a not in allowed or b not in allowed or inter < edge_min_pair_count:
-            continue
-        jac = jaccard(a, b, pairs, freq)
-        if jac >= edge_min_jaccard:
-            edges.append((a, b, inter, jac))
+NETWORK_OPTIONS = """
+  { "nodes":{"borderWidth":1,"shadow":true,"shape":"dot","font":{"color":"#fff"}},
+    "edges":{"color":{"color":"#9aa3a7"},"smooth":false},
+    "physics":{"solver":"barnesHut","barnesHut":{"theta":0.8},"stabilization":{"iterations":50}},
+    "interaction":{"hover":true,"dragNodes":true,"dragView":true,"zoomView":true} }
+"""
+
+# Standalone vis-network page; titles are HTML strings, turned into elements for the tooltips
+VIS_TEMPLATE = """<html>
+<head>
+  <script src="https://cdnjs.cloudflare.com/ajax/libs/vis-network/9.1.2/dist/vis-network.min.js"></script>
+  <style>body { margin: 0; background: #000; } #graph { width: 100%; height: 700px; background: #000; }</style>
+</head>
+<body>
+  <div id="graph"></div>
+  <script>
+    function htmlTitle(item) {
+      var el = document.createElement("div");
+      el.innerHTML = item.title;
+      return Object.assign(item, {title: el});
+    }
+    var nodes = new vis.DataSet(__NODES__.map(htmlTitle));
+    var edges = new vis.DataSet(__EDGES__.map(htmlTitle));
+    var network = new vis.Network(document.getElementById("graph"), {nodes: nodes, edges: edges}, __OPTIONS__);
+    // Freeze the layout once stabilized so the browser stops simulating physics
+    network.once("stabilizationIterationsDone", function () {
+      network.setOptions({physics: false});
+    });
+  </script>
+</body>
+</html>
+"""
+
+def filter_graph(graph, include_types, node_min_support, edge_min_pair_count, edge_min_jaccard):
+    """Boolean masks of the items and pairs that pass the sidebar thresholds."""
+    items, freq, (a_idx, b_idx, pair_inter, pair_jac), item_types, raw_labels = graph
+    allowed = np.isin(item_types, include_types) & (freq >= node_min_support)
+    edge_mask = (allowed[a_idx] & allowed[b_idx]
+                 & (pair_inter >= edge_min_pair_count) & (pair_jac >= edge_min_jaccard))
+    return allowed, edge_mask
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_galaxy_html(_graph, include_types, node_min_support, edge_min_pair_count, edge_min_jaccard, max_edges, cache_key):
+    """Network HTML plus the stats panel's (nodes, edges, top items), all from one filtering pass."""
+    # _graph is skipped by Streamlit's hasher; cache_key stands in for it
+    items, freq, (a_idx, b_idx, pair_inter, pair_jac), item_types, raw_labels = _graph
+    allowed, edge_mask = filter_graph(_graph, include_types, node_min_support, edge_min_pair_count, edge_min_jaccard)
+    if not allowed.any():
+        return "<p style='color:#fff;padding:24px;text-align:center'>No items meet the threshold.</p>", (0, 0, [])
+
+    # Most frequent filtered items (stable, so ties keep item order) for the cohesion metric
+    allowed_idx = np.flatnonzero(allowed)
+    top_items = allowed_idx[np.argsort(-freq[allowed_idx], kind="stable")[:12]].tolist()
+
+    # Strongest max_edges by (Jaccard, co-mentions), as (a_idx, b_idx, co-mentions, Jaccard)
+    sel = np.flatnonzero(edge_mask)
+    if len(sel) > max_edges:
+        # O(n) cut first: keep everything at or above the max_edges-th best Jaccard
+        # (ties included, so the final order is exactly the full sort's), then sort the few left
+        cutoff = np.partition(pair_jac[sel], len(sel) - max_edges)[len(sel) - max_edges]
+        sel = sel[pair_jac[sel] >= cutoff]
+    sel = sel[np.lexsort((-pair_inter[sel], -pair_jac[sel]))][:max_edges]
+    edges = list(zip(a_idx[sel].tolist(), b_idx[sel].tolist(), pair_inter[sel].tolist(), pair_jac[sel].tolist()))
+    stats = (len(allowed_idx), len(edges), top_items)
     if not edges:
-        return "<p style='color:#fff;padding:24px;text-align:center'>No edges meet the thresholds.</p>"
-
-    edges.sort(key=lambda x: (x[3], x[2]), reverse=True)
-    edges = edges[:max_edges]
+        return "<p style='color:#fff;padding:24px;text-align:center'>No edges meet the thresholds.</p>", stats
 
     # Only include nodes that have at least one connection meeting the thresholds
     connected_nodes = set()
@@ -239,73 +308,55 @@ def build_galaxy_html(include_types, node_min_support, edge_min_pair_count, edge
         connected_nodes.add(a)
         connected_nodes.add(b)
 
-    net = Network(height="700px", width="100%", bgcolor="#000", font_color="#fff", notebook=False)
-    net.barnes_hut(gravity=-8000, central_gravity=0.28, spring_length=190, spring_strength=0.01, damping=0.9)
-
-    # Only add nodes that have connections
-    for it in connected_nodes:
-        typ = item_types.get(it, "item")
-        label = raw_labels.get(it, it)
-        size = 12 + 6 * math.log10(max(freq[it], 10))
-        net.add_node(it, label=label, title=f"<b>{label}</b><br>Type: {typ}<br>Count: {freq[it]}",
-                     color=TYPE_COLORS.get(typ, DEFAULT_NODE_COLOR), size=size)
+    # Only add nodes that have connections; sizes computed in one numpy pass
+    nodes = list(connected_nodes)
+    node_freq = freq[nodes]
+    node_sizes = (12 + 6 * np.log10(np.maximum(node_freq, 10))).tolist()
+    vis_nodes = []
+    for i, count, size in zip(nodes, node_freq.tolist(), node_sizes):
+        typ, label = item_types[i], raw_labels[i]
+        vis_nodes.append({"id": items[i], "label": label, "title": f"<b>{label}</b><br>Type: {typ}<br>Count: {count}",
+                          "color": TYPE_COLORS.get(typ, DEFAULT_NODE_COLOR), "size": size})
 
     j_min, j_max = min(e[3] for e in edges), max(e[3] for e in edges)
     span = (j_max - j_min) or 1.0
-    for a, b, inter, jac in edges:
-        width = 1 + 8 * ((jac - j_min) / span)
-        net.add_edge(a, b, title=f"Co-mentions: {inter} • Jaccard: {jac:.3f}", width=width)
-
-    net.set_options("""
-      { "nodes":{"borderWidth":1,"shadow":true},
-        "edges":{"color":{"color":"#9aa3a7"},"smooth":{"enabled":true,"type":"dynamic"}},
-        "physics":{"solver":"barnesHut","stabilization":{"iterations":200}},
-        "interaction":{"hover":true,"dragNodes":true,"dragView":true,"zoomView":true} }
-    """)
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as tmp:
-        html_path = Path(tmp.name)
-    net.save_graph(str(html_path))
-    html = html_path.read_text("utf-8")
-    try: os.remove(html_path)
-    except Exception: pass
-    return html
-
-# Unique cache key so different clusters/selections re-render
-cache_key = (
-    cluster_choice,
-    tuple(sorted(include_types)),
-    node_min_support, edge_min_pair_count, edge_min_jaccard, max_edges,
-    len(freq), len(types_present)
-)
+    vis_edges = [{"from": items[a], "to": items[b], "title": f"Co-mentions: {inter} • Jaccard: {jac:.3f}",
+                  "width": 1 + 8 * ((jac - j_min) / span)}
+                 for a, b, inter, jac in edges]
+
+    html = (VIS_TEMPLATE
+            .replace("__OPTIONS__", NETWORK_OPTIONS)
+            .replace("__NODES__", orjson.dumps(vis_nodes).decode())
+            .replace("__EDGES__", orjson.dumps(vis_edges).decode()))
+    return html, stats
+
+# Identifies the graph data passed to build_galaxy_html (which isn't hashed itself):
+# the same dataset, model version and cluster that process_data is keyed on
+cache_key = (data_key, model_mtime, cluster_choice)
 
 col_left, col_right = st.columns([3, 1], gap="large")
 
 with col_left:
     st.subheader("🌌 Network Visualization")
-    html = build_galaxy_html(include_types, node_min_support, edge_min_pair_count, edge_min_jaccard, max_edges, cache_key)
+    html, (n_nodes, n_edges, topN) = build_galaxy_html((items, freq, pairs, item_types, raw_labels), tuple(sorted(include_types)),
+                             node_min_support, edge_min_pair_count, edge_min_jaccard, max_edges, cache_key)
     components.html(html, height=720, scrolling=True)
 
 with col_right:
     st.subheader("📈 Stats")
-    filtered_items = [it for it in freq if item_types.get(it) in include_types and freq[it] >= node_min_support]
-    st.metric("Nodes (filtered)", len(filtered_items))
-
-    edge_count = 0
-    for (a, b), inter in pairs.items():
-        if a in filtered_items and b in filtered_items and inter >= edge_min_pair_count and jaccard(a, b, pairs, freq) >= edge_min_jaccard:
-            edge_count += 1
-    st.metric("Edges (filtered)", min(edge_count, max_edges))
+    # Counts come back from the cached builder, so nothing is re-filtered here
+    a_idx, b_idx, pair_inter, pair_jac = pairs
+    st.metric("Nodes (filtered)", n_nodes)
+    st.metric("Edges (filtered)", n_edges)
 
     # Cohesion quick check (justify clustering): avg Jaccard among top items in this subset
-    def avg_j(items):
-        vals = []
-        for x, y in itertools.combinations(items, 2):
-            if x in freq and y in freq:
-                vals.append(jaccard(x, y, pairs, freq))
-        return float(np.mean(vals)) if vals else float("nan")
-
-    topN = sorted(filtered_items, key=lambda it: freq[it], reverse=True)[:12]
+    def avg_j(idx):
+        # Pairs missing from the co-occurrence arrays never co-occur (Jaccard 0),
+        # so the mean over all k*(k-1)/2 pairs only needs the ones present
+        k = len(idx)
+        in_top = np.isin(a_idx, idx) & np.isin(b_idx, idx)
+        return float(pair_jac[in_top].sum() / (k * (k - 1) / 2)) if k >= 2 else float("nan")
+
     if len(topN) >= 3:
         st.metric("Avg Jaccard among top items", f"{avg_j(topN):.3f}")
 
@@ -1,10 +1,10 @@
 import streamlit as st
-import pandas as pd
 from pathlib import Path
 from backend.clustering import (
     train_and_save_clustering_model, 
     load_clustering_artifacts
 )
+from backend.data_loader import DATA_PATH, PARQUET_PATH, get_starwars_df, write_parquet_copy
 
 st.set_page_config(layout="wide", page_title="⚙️ Model Management")
 
@@ -13,31 +13,37 @@ st.caption("Train, load, and manage the clustering model for the Star Wars fan a
 
 # --- Paths ---
 BASE_DIR = Path(__file__).resolve().parent.parent
-DATA_PATH = BASE_DIR / "data" / "starwars.csv"
 MODELS_DIR = BASE_DIR / "models"
 
-# --- State Management ---
-def initialize_state():
-    if 'artifacts_loaded' not in st.session_state:
-        st.session_state.artifacts_loaded = False
-    if 'kmeans_model' not in st.session_state:
-        st.session_state.kmeans_model = None
-    if 'encoder' not in st.session_state:
-        st.session_state.encoder = None
-    if 'top_features' not in st.session_state:
-        st.session_state.top_features = None
-
-initialize_state()
+# --- Shared Artifacts ---
+# One cached copy per server process (cache_resource), shared by every page and session
+kmeans_model, encoder, top_features, _ = load_clustering_artifacts()
 
 # --- Model Status Section ---
 st.header("📊 Model Status")
 
 # Check if model artifacts exist
-artifacts_exist = all([
-    (MODELS_DIR / "kmeans_model.joblib").exists(),
-    (MODELS_DIR / "encoder.joblib").exists(),
-    (MODELS_DIR / "top_features.joblib").exists()
-])
+@st.cache_data(ttl=5)
+def artifacts_present(models_mtime):
+    """Whether all four artifact files exist; models_mtime re-keys the cache when files are added or removed."""
+    return all([
+        (MODELS_DIR / "kmeans_model.joblib").exists(),
+        (MODELS_DIR / "encoder.joblib").exists(),
+        (MODELS_DIR / "top_features.joblib").exists(),
+        (MODELS_DIR / "top_idx.joblib").exists()
+    ])
+
+artifacts_exist = artifacts_present(MODELS_DIR.stat().st_mtime_ns)
+
+@st.cache_data(ttl=60)
+def _artifact_sizes():
+    """Sizes of the four artifact files in KB; cleared after training, otherwise refreshed every minute."""
+    return [
+        (MODELS_DIR / "kmeans_model.joblib").stat().st_size / 1024,
+        (MODELS_DIR / "encoder.joblib").stat().st_size / 1024,
+        (MODELS_DIR / "top_features.joblib").stat().st_size / 1024,
+        (MODELS_DIR / "top_idx.joblib").stat().st_size / 1024
+    ]
 
 col1, col2, col3 = st.columns(3)
 
@@ -48,18 +54,15 @@ with col1:
         st.error("❌ Model artifacts not found")
 
 with col2:
-    if st.session_state.artifacts_loaded:
-        st.success("✅ Model loaded in session")
+    if kmeans_model is not None:
+        st.success("✅ Model loaded")
     else:
-        st.warning("⚠️ Model not loaded in session")
+        st.warning("⚠️ Model not loaded")
 
 with col3:
     if artifacts_exist:
         # Show file sizes
-        kmeans_size = (MODELS_DIR / "kmeans_model.joblib").stat().st_size / 1024
-        encoder_size = (MODELS_DIR / "encoder.joblib").stat().st_size / 1024
-        features_size = (MODELS_DIR / "top_features.joblib").stat().st_size / 1024
-        total_size = kmeans_size + encoder_size + features_size
+        total_size = sum(_artifact_sizes())
         st.metric("Total Size", f"{total_size:.1f} KB")
 
 # --- Model Actions Section ---
@@ -69,16 +72,13 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Load Model")
-    st.caption("Load existing model artifacts into the current session")
+    st.caption("Reload the model artifacts from disk for every page and session")
     
     if st.button("🔄 Reload Model Artifacts", type="secondary", use_container_width=True):
         with st.spinner("Loading model artifacts..."):
-            model, enc, features = load_clustering_artifacts()
+            load_clustering_artifacts.clear()
+            model, _, _, _ = load_clustering_artifacts()
             if model is not None:
-                st.session_state.kmeans_model = model
-                st.session_state.encoder = enc
-                st.session_state.top_features = features
-                st.session_state.artifacts_loaded = True
                 st.success("✅ Model loaded successfully!")
                 st.rerun()
             else:
@@ -90,39 +90,37 @@ with col2:
     
     if st.button("🚀 Train Clustering Model", type="primary", use_container_width=True):
         with st.spinner("Training model... This might take a minute."):
-            model, enc, features = train_and_save_clustering_model()
+            # Training clears the cached artifacts, so the rerun picks up the new model
+            model, _, _, _ = train_and_save_clustering_model()
             if model is not None:
-                st.session_state.kmeans_model = model
-                st.session_state.encoder = enc
-                st.session_state.top_features = features
-                st.session_state.artifacts_loaded = True
+                _artifact_sizes.clear()
                 st.success("✅ Model trained and saved successfully!")
                 st.rerun()
             else:
                 st.error("❌ Model training failed")
 
 # --- Model Information Section ---
-if st.session_state.artifacts_loaded and st.session_state.kmeans_model is not None:
+if kmeans_model is not None:
     st.header("📈 Model Information")
     
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if hasattr(st.session_state.kmeans_model, 'n_clusters'):
-            st.metric("Number of Clusters", st.session_state.kmeans_model.n_clusters)
+        if hasattr(kmeans_model, 'n_clusters'):
+            st.metric("Number of Clusters", kmeans_model.n_clusters)
         else:
             st.metric("Number of Clusters", "Unknown")
     
     with col2:
-        if st.session_state.top_features is not None:
-            st.metric("Top Features", len(st.session_state.top_features))
+        if top_features is not None:
+            st.metric("Top Features", len(top_features))
         else:
             st.metric("Top Features", "Unknown")
     
     with col3:
-        if st.session_state.encoder is not None:
-            if hasattr(st.session_state.encoder, 'n_features_in_'):
-                st.metric("Input Features", st.session_state.encoder.n_features_in_)
+        if encoder is not None:
+            if hasattr(encoder, 'n_features_in_'):
+                st.metric("Input Features", encoder.n_features_in_)
             else:
                 st.metric("Input Features", "Unknown")
         else:
@@ -131,24 +129,48 @@ if st.session_state.artifacts_loaded and st.session_state.kmeans_model is not No
 # --- Data Information Section ---
 st.header("📋 Data Information")
 
+@st.cache_data
+def _data_stats(data_mtime):
+    """Record count, fav_* column count, missing-value share and a head() sample, once per CSV version."""
+    # Shared, read-only frame for this same CSV version (re-read when the mtime changes)
+    df = get_starwars_df(data_mtime)
+    fav_count = int(df.columns.str.lower().str.startswith("fav_").sum())
+    missing_pct = df.isna().to_numpy().sum() / df.size * 100
+    return len(df), fav_count, missing_pct, df.head()
+
 if DATA_PATH.exists():
-    df = pd.read_csv(DATA_PATH)
+    n_records, n_fav_cols, missing_pct, sample_df = _data_stats(DATA_PATH.stat().st_mtime_ns)
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Total Records", f"{len(df):,}")
+        st.metric("Total Records", f"{n_records:,}")
     
     with col2:
-        fav_cols = [c for c in df.columns if c.lower().startswith("fav_")]
-        st.metric("Favorite Categories", len(fav_cols))
+        st.metric("Favorite Categories", n_fav_cols)
     
     with col3:
-        missing_pct = (df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100
         st.metric("Missing Data", f"{missing_pct:.1f}%")
     
     # Show sample of the data
     st.subheader("Sample Data")
-    st.dataframe(df.head(), use_container_width=True)
+    st.dataframe(sample_df, use_container_width=True)
+    
+    # --- Data Cache ---
+    st.subheader("Data Cache")
+    parquet_fresh = PARQUET_PATH.exists() and PARQUET_PATH.stat().st_mtime_ns >= DATA_PATH.stat().st_mtime_ns
+    if parquet_fresh:
+        st.caption("✅ The Parquet copy of the survey is up to date with the CSV")
+    else:
+        st.caption("⚠️ The Parquet copy is missing or older than the CSV; pages are reading the CSV")
+    
+    if st.button("🗃️ Rebuild Data Cache", use_container_width=True):
+        with st.spinner("Writing Parquet copy..."):
+            try:
+                write_parquet_copy()
+                st.success("✅ Data cache rebuilt!")
+                st.rerun()
+            except OSError as e:
+                st.error(f"❌ Could not write {PARQUET_PATH}: {e}")
 else:
     st.error(f"❌ Data file not found at {DATA_PATH}")
 
@@ -168,9 +190,10 @@ st.markdown("""
 ### How to Use This Page:
 
 1. **Check Model Status**: The status indicators show if model files exist and if they're loaded
-2. **Load Model**: If model files exist but aren't loaded, use the "Reload Model Artifacts" button
+2. **Load Model**: If the model files changed on disk or failed to load, use the "Reload Model Artifacts" button
 3. **Train Model**: If no model exists or you want to retrain, use the "Train Clustering Model" button
-4. **Monitor Progress**: Watch the spinners and success/error messages for feedback
+4. **Rebuild Data Cache**: After editing the survey CSV, use the "Rebuild Data Cache" button so pages load from a fresh Parquet copy
+5. **Monitor Progress**: Watch the spinners and success/error messages for feedback
 
 ### When to Train a New Model:
 - First time using the application
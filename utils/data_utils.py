@@ -4,11 +4,11 @@ Utility functions for data processing and manipulation
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from io import BytesIO
+from datetime import date, datetime, timedelta
 import streamlit as st
 from config.config import *
 
-@st.cache_data
 def generate_sample_healthcare_data(size=SAMPLE_DATA_SIZE):
     """
     Generate sample healthcare data for demonstration purposes
@@ -19,34 +19,55 @@ def generate_sample_healthcare_data(size=SAMPLE_DATA_SIZE):
     Returns:
         pd.DataFrame: Sample healthcare dataset
     """
-    np.random.seed(42)
-    
+    # Today's date is part of the cache key, so the admission window follows the calendar
+    return _generate_sample_healthcare_data(size, date.today())
+
+# Seeded, so the result is pickled to disk and survives server restarts;
+# max_entries bounds the cache as sizes and days accumulate
+@st.cache_data(persist="disk", max_entries=3)
+def _generate_sample_healthcare_data(size, as_of):
+    end = datetime.combine(as_of, datetime.min.time())
+    rng = np.random.default_rng(42)
+    
+    age = rng.integers(AGE_RANGE[0], AGE_RANGE[1], size, dtype=np.int16)
+    condition_code = rng.integers(0, len(HEALTH_CONDITIONS), size, dtype=np.int8)
+    severity_code = rng.choice(3, size, p=[0.5, 0.3, 0.2]).astype(np.int8)
+    health_score = rng.integers(HEALTH_SCORE_RANGE[0], HEALTH_SCORE_RANGE[1], size, dtype=np.int32)
+    treatment_days = rng.integers(TREATMENT_DAYS_RANGE[0], TREATMENT_DAYS_RANGE[1], size, dtype=np.int32)
+    cost = rng.integers(COST_RANGE[0], COST_RANGE[1], size, dtype=np.int32)
+    
+    # Add some correlations to make data more realistic (masks computed once on the raw arrays)
+    health_score = np.where(age > 65, health_score * 0.8, health_score)
+    cost = np.where(severity_code == 2, cost * 1.5, cost)
+    treatment_days = np.where(
+        condition_code == HEALTH_CONDITIONS.index('Cardiovascular'), treatment_days * 1.2, treatment_days
+    )
+    
+    # Low-cardinality text columns are stored as integer codes plus a category table
     data = {
         'patient_id': range(1, size + 1),
-        'age': np.random.randint(AGE_RANGE[0], AGE_RANGE[1], size),
-        'gender': np.random.choice(['Male', 'Female', 'Other'], size, p=[0.48, 0.48, 0.04]),
-        'condition': np.random.choice(HEALTH_CONDITIONS, size),
-        'health_score': np.random.randint(HEALTH_SCORE_RANGE[0], HEALTH_SCORE_RANGE[1], size),
-        'treatment_days': np.random.randint(TREATMENT_DAYS_RANGE[0], TREATMENT_DAYS_RANGE[1], size),
-        'cost': np.random.randint(COST_RANGE[0], COST_RANGE[1], size),
+        'age': age,
+        'gender': pd.Categorical.from_codes(
+            rng.choice(3, size, p=[0.48, 0.48, 0.04]).astype(np.int8), ['Male', 'Female', 'Other']
+        ),
+        'condition': pd.Categorical.from_codes(condition_code, HEALTH_CONDITIONS),
+        'health_score': health_score,
+        'treatment_days': treatment_days,
+        'cost': cost,
         'admission_date': pd.date_range(
-            start=datetime.now() - timedelta(days=365),
-            end=datetime.now(),
+            start=end - timedelta(days=365),
+            end=end,
             periods=size
         ),
-        'state': np.random.choice([
-            'CA', 'TX', 'FL', 'NY', 'PA', 'IL', 'OH', 'GA', 'NC', 'MI'
-        ], size),
-        'severity': np.random.choice(['Low', 'Medium', 'High'], size, p=[0.5, 0.3, 0.2])
+        'state': pd.Categorical.from_codes(
+            rng.integers(0, 10, size, dtype=np.int8),
+            ['CA', 'TX', 'FL', 'NY', 'PA', 'IL', 'OH', 'GA', 'NC', 'MI']
+        ),
+        'severity': pd.Categorical.from_codes(severity_code, ['Low', 'Medium', 'High'])
     }
     
     df = pd.DataFrame(data)
     
-    # Add some correlations to make data more realistic
-    df.loc[df['age'] > 65, 'health_score'] = df.loc[df['age'] > 65, 'health_score'] * 0.8
-    df.loc[df['severity'] == 'High', 'cost'] = df.loc[df['severity'] == 'High', 'cost'] * 1.5
-    df.loc[df['condition'] == 'Cardiovascular', 'treatment_days'] = df.loc[df['condition'] == 'Cardiovascular', 'treatment_days'] * 1.2
-    
     return df
 
 def load_data(data_source, date_range=None):
@@ -76,13 +97,20 @@ def load_data(data_source, date_range=None):
     # Filter by date range if provided
     if date_range and len(date_range) == 2:
         start_date, end_date = date_range
-        df = df[
-            (df['admission_date'].dt.date >= start_date) & 
-            (df['admission_date'].dt.date <= end_date)
-        ]
+        # Compare datetime64 values directly; end is exclusive at the next midnight
+        start = np.datetime64(start_date, 'ns')
+        end = np.datetime64(end_date, 'ns') + np.timedelta64(1, 'D')
+        dates = df['admission_date'].to_numpy()
+        if df['admission_date'].is_monotonic_increasing:
+            # Sample admissions come from pd.date_range, so a binary search finds the slice
+            lo, hi = np.searchsorted(dates, [start, end])
+            df = df.iloc[lo:hi]
+        else:
+            df = df[(dates >= start) & (dates < end)]
     
     return df
 
+@st.cache_data
 def calculate_key_metrics(df):
     """
     Calculate key metrics from the healthcare dataset
@@ -93,14 +121,17 @@ def calculate_key_metrics(df):
     Returns:
         dict: Dictionary containing key metrics
     """
+    # All four numeric means in one reduction
+    means = df[['age', 'health_score', 'treatment_days', 'cost']].mean()
+    
     metrics = {
         'total_records': len(df),
         'unique_patients': df['patient_id'].nunique(),
-        'avg_age': df['age'].mean(),
-        'avg_health_score': df['health_score'].mean(),
-        'avg_treatment_days': df['treatment_days'].mean(),
+        'avg_age': means['age'],
+        'avg_health_score': means['health_score'],
+        'avg_treatment_days': means['treatment_days'],
         'total_cost': df['cost'].sum(),
-        'avg_cost': df['cost'].mean(),
+        'avg_cost': means['cost'],
         'condition_counts': df['condition'].value_counts().to_dict(),
         'severity_distribution': df['severity'].value_counts(normalize=True).to_dict(),
         'gender_distribution': df['gender'].value_counts(normalize=True).to_dict()
@@ -119,25 +150,28 @@ def filter_data(df, filters):
     Returns:
         pd.DataFrame: Filtered dataset
     """
-    filtered_df = df.copy()
+    # One boolean mask ANDed across all filters, then a single row selection
+    mask = np.ones(len(df), dtype=bool)
     
     if 'age_range' in filters:
         min_age, max_age = filters['age_range']
-        filtered_df = filtered_df[
-            (filtered_df['age'] >= min_age) & 
-            (filtered_df['age'] <= max_age)
-        ]
+        age = df['age'].to_numpy()
+        mask &= (age >= min_age) & (age <= max_age)
     
     if 'conditions' in filters and filters['conditions']:
-        filtered_df = filtered_df[filtered_df['condition'].isin(filters['conditions'])]
+        mask &= df['condition'].isin(filters['conditions']).to_numpy()
     
     if 'severity' in filters and filters['severity']:
-        filtered_df = filtered_df[filtered_df['severity'].isin(filters['severity'])]
+        mask &= df['severity'].isin(filters['severity']).to_numpy()
     
     if 'gender' in filters and filters['gender']:
-        filtered_df = filtered_df[filtered_df['gender'].isin(filters['gender'])]
-    
-    return filtered_df
+        mask &= df['gender'].isin(filters['gender']).to_numpy()
+
+    # Nothing filtered out (e.g. the default, empty filters): hand back the input as-is
+    if mask.all():
+        return df
+
+    return df[mask]
 
 def export_data(df, format='csv'):
     """
@@ -151,10 +185,15 @@ def export_data(df, format='csv'):
         bytes: Exported data as bytes
     """
     if format == 'csv':
-        return df.to_csv(index=False).encode('utf-8')
+        # Write bytes straight into the buffer instead of building a str and re-encoding it
+        output = BytesIO()
+        df.to_csv(output, index=False, encoding='utf-8')
+        return output.getvalue()
     elif format == 'excel':
         output = BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        # constant_memory flushes each row as it's written instead of holding the whole sheet
+        with pd.ExcelWriter(output, engine='xlsxwriter',
+                            engine_kwargs={'options': {'constant_memory': True}}) as writer:
             df.to_excel(writer, index=False, sheet_name='Healthcare_Data')
         return output.getvalue()
     elif format == 'json':
@@ -178,23 +217,25 @@ def validate_data(df):
         'warnings': []
     }
     
-    # Check for missing values
-    missing_values = df.isnull().sum()
-    if missing_values.any():
+    # Check for missing values (per-column counts only when there are any)
+    if df.isna().to_numpy().any():
+        missing_values = df.isnull().sum()
         validation_results['warnings'].append(f"Missing values found: {missing_values[missing_values > 0].to_dict()}")
     
     # Check for duplicate patient IDs
-    if df['patient_id'].duplicated().any():
+    if not df['patient_id'].is_unique:
         validation_results['issues'].append("Duplicate patient IDs found")
         validation_results['is_valid'] = False
     
     # Check for invalid age values
-    if (df['age'] < 0).any() or (df['age'] > 150).any():
+    age = df['age'].to_numpy()
+    if np.any((age < 0) | (age > 150)):
         validation_results['issues'].append("Invalid age values found")
         validation_results['is_valid'] = False
     
     # Check for invalid health scores
-    if (df['health_score'] < 1).any() or (df['health_score'] > 100).any():
+    health_score = df['health_score'].to_numpy()
+    if np.any((health_score < 1) | (health_score > 100)):
         validation_results['issues'].append("Invalid health score values found")
         validation_results['is_valid'] = False
     
@@ -0,0 +1,17 @@
+"""
+Utility functions for building cache keys
+"""
+
+import pandas as pd
+
+def frame_fingerprint(df):
+    """
+    Cache key standing in for a whole DataFrame
+    
+    Args:
+        df (pd.DataFrame): Dataset to fingerprint
+        
+    Returns:
+        tuple: Shape, column names and a hash over every row (index included)
+    """
+    return (df.shape, tuple(df.columns), int(pd.util.hash_pandas_object(df, index=True).sum()))
@@ -1,15 +1,16 @@
 """
 Utility functions for creating visualizations
+
+Plotly is imported inside each chart builder, so importing this module stays
+cheap for pages that never draw a chart (later imports hit sys.modules).
 """
 
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 import streamlit as st
 from config.config import COLOR_PALETTE, DEFAULT_CHART_HEIGHT
 
+@st.cache_data
 def create_age_distribution_chart(df):
     """
     Create an age distribution histogram
@@ -20,6 +21,8 @@ def create_age_distribution_chart(df):
     Returns:
         plotly.graph_objects.Figure: Age distribution chart
     """
+    import plotly.express as px
+    
     fig = px.histogram(
         df, 
         x='age', 
@@ -36,6 +39,7 @@ def create_age_distribution_chart(df):
     
     return fig
 
+@st.cache_data
 def create_condition_distribution_chart(df):
     """
     Create a pie chart showing condition distribution
@@ -46,6 +50,8 @@ def create_condition_distribution_chart(df):
     Returns:
         plotly.graph_objects.Figure: Condition distribution chart
     """
+    import plotly.express as px
+    
     condition_counts = df['condition'].value_counts()
     
     fig = px.pie(
@@ -59,6 +65,7 @@ def create_condition_distribution_chart(df):
     
     return fig
 
+@st.cache_data
 def create_health_score_by_age_scatter(df):
     """
     Create a scatter plot of health score vs age
@@ -69,20 +76,30 @@ def create_health_score_by_age_scatter(df):
     Returns:
         plotly.graph_objects.Figure: Scatter plot
     """
+    import plotly.express as px
+
+    # One marker per distinct (age, score, condition), sized by patient count,
+    # so the browser receives the unique points rather than every row
+    points = df.groupby(['age', 'health_score', 'condition'], observed=True).size().reset_index(name='n')
+
     fig = px.scatter(
-        df, 
-        x='age', 
+        points,
+        x='age',
         y='health_score',
         color='condition',
+        size='n',
+        size_max=12,
         title="Health Score vs Age by Condition",
-        labels={'age': 'Age', 'health_score': 'Health Score'},
-        color_discrete_sequence=COLOR_PALETTE
+        labels={'age': 'Age', 'health_score': 'Health Score', 'n': 'Patients'},
+        color_discrete_sequence=COLOR_PALETTE,
+        render_mode='webgl'
     )
     
     fig.update_layout(height=DEFAULT_CHART_HEIGHT)
     
     return fig
 
+@st.cache_data
 def create_cost_analysis_chart(df):
     """
     Create a box plot showing cost distribution by condition
@@ -93,6 +110,8 @@ def create_cost_analysis_chart(df):
     Returns:
         plotly.graph_objects.Figure: Cost analysis chart
     """
+    import plotly.express as px
+    
     fig = px.box(
         df, 
         x='condition', 
@@ -110,6 +129,7 @@ def create_cost_analysis_chart(df):
     
     return fig
 
+@st.cache_data
 def create_monthly_trends_chart(df):
     """
     Create a line chart showing monthly admission trends
@@ -120,17 +140,17 @@ def create_monthly_trends_chart(df):
     Returns:
         plotly.graph_objects.Figure: Monthly trends chart
     """
-    # Group by month and count admissions
-    df['month'] = df['admission_date'].dt.to_period('M')
-    monthly_counts = df.groupby('month').size().reset_index(name='admissions')
-    monthly_counts['month'] = monthly_counts['month'].astype(str)
+    import plotly.express as px
+    
+    # Count admissions per calendar month on a datetime64[M] key
+    # (no Period objects, and the caller's frame isn't modified)
+    months, admissions = np.unique(df['admission_date'].to_numpy().astype('datetime64[M]'), return_counts=True)
     
     fig = px.line(
-        monthly_counts, 
-        x='month', 
-        y='admissions',
+        x=months.astype(str), 
+        y=admissions,
         title="Monthly Admission Trends",
-        labels={'month': 'Month', 'admissions': 'Number of Admissions'},
+        labels={'x': 'Month', 'y': 'Number of Admissions'},
         markers=True
     )
     
@@ -142,6 +162,7 @@ def create_monthly_trends_chart(df):
     
     return fig
 
+@st.cache_data
 def create_severity_by_condition_chart(df):
     """
     Create a stacked bar chart showing severity distribution by condition
@@ -152,31 +173,31 @@ def create_severity_by_condition_chart(df):
     Returns:
         plotly.graph_objects.Figure: Severity by condition chart
     """
-    # Create crosstab
-    severity_condition = pd.crosstab(df['condition'], df['severity'])
+    import plotly.graph_objects as go
     
-    fig = go.Figure()
+    # Create crosstab (fixed severity order, missing levels as zeros)
+    severity_levels = ['Low', 'Medium', 'High']
+    severity_condition = pd.crosstab(df['condition'], df['severity']).reindex(columns=severity_levels, fill_value=0)
+    conditions = severity_condition.index.astype(str).to_numpy()
+    counts = severity_condition.to_numpy()
     
-    for i, severity in enumerate(['Low', 'Medium', 'High']):
-        if severity in severity_condition.columns:
-            fig.add_trace(go.Bar(
-                name=severity,
-                x=severity_condition.index,
-                y=severity_condition[severity],
-                marker_color=COLOR_PALETTE[i]
-            ))
+    traces = [
+        go.Bar(name=severity, x=conditions, y=counts[:, i], marker_color=COLOR_PALETTE[i])
+        for i, severity in enumerate(severity_levels)
+    ]
     
-    fig.update_layout(
+    fig = go.Figure(data=traces, layout=dict(
         title="Severity Distribution by Health Condition",
         xaxis_title="Health Condition",
         yaxis_title="Number of Cases",
         barmode='stack',
         height=DEFAULT_CHART_HEIGHT,
         xaxis_tickangle=-45
-    )
+    ))
     
     return fig
 
+@st.cache_data
 def create_treatment_duration_chart(df):
     """
     Create a violin plot showing treatment duration distribution
@@ -187,6 +208,8 @@ def create_treatment_duration_chart(df):
     Returns:
         plotly.graph_objects.Figure: Treatment duration chart
     """
+    import plotly.express as px
+    
     fig = px.violin(
         df, 
         x='condition', 
@@ -205,6 +228,7 @@ def create_treatment_duration_chart(df):
     
     return fig
 
+@st.cache_data
 def create_geographic_distribution_chart(df):
     """
     Create a bar chart showing patient distribution by state
@@ -215,6 +239,8 @@ def create_geographic_distribution_chart(df):
     Returns:
         plotly.graph_objects.Figure: Geographic distribution chart
     """
+    import plotly.express as px
+    
     state_counts = df['state'].value_counts()
     
     fig = px.bar(
@@ -229,6 +255,7 @@ def create_geographic_distribution_chart(df):
     
     return fig
 
+@st.cache_data
 def create_correlation_heatmap(df):
     """
     Create a correlation heatmap for numerical variables
@@ -239,12 +266,18 @@ def create_correlation_heatmap(df):
     Returns:
         plotly.graph_objects.Figure: Correlation heatmap
     """
+    import plotly.express as px
+    
     # Select numerical columns
     numerical_cols = ['age', 'health_score', 'treatment_days', 'cost']
-    correlation_matrix = df[numerical_cols].corr()
+    # One contiguous 2-D array and a single corrcoef call instead of pandas' pairwise loop
+    values = np.ascontiguousarray(df[numerical_cols].to_numpy(dtype=np.float64))
+    correlation_matrix = np.corrcoef(values, rowvar=False)
     
     fig = px.imshow(
         correlation_matrix,
+        x=numerical_cols,
+        y=numerical_cols,
         title="Correlation Matrix of Numerical Variables",
         color_continuous_scale='RdBu_r',
         aspect='auto'
@@ -278,6 +311,17 @@ def create_dashboard_summary_charts(df):
     
     return charts
 
+# One card's markup, filled in per metric by create_custom_metric_cards
+_METRIC_CARD = """
+        <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+                    color: white; padding: 20px; border-radius: 10px; 
+                    text-align: center; min-width: 150px; margin: 0 10px;">
+            <div style="font-size: 2em;">{icon}</div>
+            <div style="font-size: 1.5em; font-weight: bold;">{value}</div>
+            <div style="font-size: 0.9em; opacity: 0.8;">{title}</div>
+        </div>
+        """
+
 def create_custom_metric_cards(metrics):
     """
     Create custom HTML for metric cards
@@ -288,10 +332,6 @@ def create_custom_metric_cards(metrics):
     Returns:
         str: HTML string for metric cards
     """
-    html = """
-    <div style="display: flex; justify-content: space-around; margin: 20px 0;">
-    """
-    
     metric_items = [
         ("Total Patients", f"{metrics['total_records']:,}", "👥"),
         ("Avg Age", f"{metrics['avg_age']:.1f}", "📅"),
@@ -299,16 +339,10 @@ def create_custom_metric_cards(metrics):
         ("Total Cost", f"${metrics['total_cost']:,}", "💰")
     ]
     
-    for title, value, icon in metric_items:
-        html += f"""
-        <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                    color: white; padding: 20px; border-radius: 10px; 
-                    text-align: center; min-width: 150px; margin: 0 10px;">
-            <div style="font-size: 2em;">{icon}</div>
-            <div style="font-size: 1.5em; font-weight: bold;">{value}</div>
-            <div style="font-size: 0.9em; opacity: 0.8;">{title}</div>
-        </div>
-        """
+    # Joined once rather than grown with += per card
+    cards = "".join(_METRIC_CARD.format(icon=icon, value=value, title=title)
+                    for title, value, icon in metric_items)
     
-    html += "</div>"
-    return html
+    return f"""
+    <div style="display: flex; justify-content: space-around; margin: 20px 0;">
+    {cards}</div>"""